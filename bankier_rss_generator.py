@@ -5,15 +5,32 @@ Generator kanału RSS dla Bankier.pl/wiadomosc
 Optimized for GitHub Actions & automation
 """
 
+import asyncio
+import importlib.util
+import logging
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+from lxml import html, etree
 from feedgen.feed import FeedGenerator
-from datetime import datetime, timedelta
-import pytz
-import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import json
+import pickle
+from zoneinfo import ZoneInfo
+import os
+import random
+import re
 import sys
+import traceback
 from urllib.parse import urljoin
 
+# aiohttp dekoduje Brotli tylko gdy jest zainstalowany pakiet brotli lub
+# brotlicffi - bez nich nie możemy deklarować obsługi "br"
+if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+else:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
 # ============================================================================
 # KONFIGURACJA
 # ============================================================================
@@ -23,14 +40,61 @@ NEWS_URL = f"{BASE_URL}/wiadomosc/"
 PAGES_TO_SCAN = 5  # Liczba stron do przeskanowania
 TIME_FILTER_HOURS = 48  # Artykuły z ostatnich 48h
 OUTPUT_FILE = "bankier_rss.xml"
-REQUEST_DELAY = 2  # Sekundy między requestami (anti-bot)
+HTTP_CACHE_FILE = "bankier_etags.json"  # ETag/Last-Modified per URL (conditional GET)
+PAGE_CACHE_FILE = "bankier_pages.pkl"  # Sparsowane artykuły per URL (dla odpowiedzi 304)
+ARTICLES_CACHE_FILE = "bankier_articles.pkl"  # Artykuły z poprzedniego uruchomienia (+ czy było kompletne)
+PRETTY_RSS = os.environ.get("BANKIER_PRETTY_RSS") == "1"  # Formatowanie XML (do ręcznego podglądu)
+DEBUG = os.environ.get("BANKIER_DEBUG") == "1"  # Pełne tracebacki błędów parsowania
+LOG_LEVEL = os.environ.get("LOGLEVEL", "INFO").upper()  # DEBUG pokazuje szczegóły każdego artykułu
+MAX_CONCURRENT_REQUESTS = 2  # Limit równoległych requestów = okno stron pobieranych naraz (anti-bot)
+CONNECTION_POOL_SIZE = 4  # Maks. otwartych połączeń (keep-alive)
+CONNECT_TIMEOUT = 5  # Sekundy na nawiązanie połączenia
+READ_TIMEOUT = 15  # Sekundy na odczyt odpowiedzi
+RETRY_TOTAL = 3  # Liczba ponownych prób po pierwszym requeście
+RETRY_BACKOFF_FACTOR = 1  # Opóźnienie: factor * 2^(próba-1) sekund
+RETRY_MAX_DELAY = 30  # Górny limit opóźnienia między próbami (sekundy)
+RETRY_JITTER = 0.5  # Losowe wydłużenie opóźnienia o 0-50% (rozprasza ponowienia)
+
+# Logowanie na stdout - komunikaty per artykuł są na poziomie DEBUG
+if not isinstance(logging.getLevelName(LOG_LEVEL), int):
+    LOG_LEVEL = "INFO"  # Nieznany poziom - nie przerywamy działania skryptu
+logging.basicConfig(level=LOG_LEVEL, format="%(message)s", stream=sys.stdout)
+log = logging.getLogger("bankier")
+
+# Znacznik zwracany przez fetch_page_async dla odpowiedzi 304 Not Modified
+NOT_MODIFIED = object()
+
+# Strefa czasowa serwisu (tworzona raz, używana przy każdym artykule)
+WARSAW_TZ = ZoneInfo('Europe/Warsaw')
+
+# Prekompilowane wyrażenia XPath (ewaluowane w C przez lxml).
+# Klasy dopasowujemy jak selektor CSS (.klasa), tj. jako jedną z klas
+# w atrybucie class, a nie porównanie całego atrybutu.
+def xpath_has_class(name):
+    """Predykat XPath odpowiadający selektorowi CSS .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+XP_ARTICLES = etree.XPath(f"//div[{xpath_has_class('article')}]")  # div.article
+XP_TITLE_A = etree.XPath(f".//span[{xpath_has_class('entry-title')}]/a")  # span.entry-title > a
+XP_META_TIME = etree.XPath(  # div.entry-meta time.entry-date
+    f".//div[{xpath_has_class('entry-meta')}]//time[{xpath_has_class('entry-date')}]/@datetime"
+)
+XP_TIME = etree.XPath(f".//time[{xpath_has_class('entry-date')}]/@datetime")  # time.entry-date
+XP_DESC = etree.XPath(f".//div[{xpath_has_class('entry-content')}]/p")  # div.entry-content > p
+XP_DESC_TEXT = etree.XPath(  # tekst akapitu bez linku a.more-link ("Czytaj dalej")
+    f".//text()[not(ancestor::a[{xpath_has_class('more-link')}])]"
+)
+
+# Deklaracja kodowania w HTML (<meta charset=...> lub http-equiv Content-Type)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.IGNORECASE)
 
 # Nagłówki HTTP imitujące przeglądarkę
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
     'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
-    'Accept-Encoding': 'gzip, deflate, br',
+    'Accept-Encoding': ACCEPT_ENCODING,
     'Referer': 'https://www.bankier.pl/',
     'Connection': 'keep-alive',
     'Upgrade-Insecure-Requests': '1',
@@ -48,127 +112,234 @@ def get_page_url(page_number):
     return f"{NEWS_URL}{page_number}/"
 
 
-def fetch_page(url, retry=3):
-    """Pobiera stronę z obsługą błędów i retry"""
-    for attempt in range(retry):
+def get_retry_after(response):
+    """Zwraca czas oczekiwania z nagłówka Retry-After (w sekundach) lub None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def load_http_cache(path=HTTP_CACHE_FILE):
+    """Wczytuje mapę {url: {"etag": ..., "last_modified": ...}} z poprzedniego uruchomienia"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log.warning("⚠ Nie udało się wczytać %s: %s", path, e)
+        return {}
+
+
+def save_http_cache(http_cache, path=HTTP_CACHE_FILE):
+    """Zapisuje mapę ETag/Last-Modified do pliku JSON"""
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(http_cache, f, indent=2)
+    except OSError as e:
+        log.warning("⚠ Nie udało się zapisać %s: %s", path, e)
+
+
+def load_pickle(path, default):
+    """Wczytuje dane zapisane przez save_pickle (lub default, jeśli brak pliku)"""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        log.warning("⚠ Nie udało się wczytać %s: %s", path, e)
+        return default
+
+
+def save_pickle(data, path):
+    """Zapisuje dane (artykuły, cache stron) do pliku pickle"""
+    try:
+        with open(path, 'wb') as f:
+            pickle.dump(data, f)
+    except OSError as e:
+        log.warning("⚠ Nie udało się zapisać %s: %s", path, e)
+
+
+def get_conditional_headers(validators):
+    """Buduje nagłówki conditional GET na podstawie zapisanych walidatorów"""
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+async def fetch_page_async(session, url, http_cache=None, retry=RETRY_TOTAL):
+    """
+    Pobiera stronę asynchronicznie z obsługą błędów i retry.
+    Jeśli podano http_cache, wysyła conditional GET i aktualizuje walidatory;
+    Zwraca (content, charset) - charset z nagłówka Content-Type lub None;
+    dla odpowiedzi 304 zwraca NOT_MODIFIED, a przy błędzie None.
+    """
+    if http_cache is None:
+        http_cache = {}
+    headers = get_conditional_headers(http_cache.get(url, {}))
+    attempts = retry + 1
+    for attempt in range(attempts):
+        wait_time = min(RETRY_MAX_DELAY, RETRY_BACKOFF_FACTOR * (2 ** attempt))
+        wait_time *= 1 + random.random() * RETRY_JITTER
         try:
-            print(f"  → Pobieranie: {url} (próba {attempt + 1}/{retry})")
-            response = requests.get(url, headers=HEADERS, timeout=15, allow_redirects=True)
-            response.raise_for_status()
-            # POPRAWKA: Wymuszamy UTF-8
-            response.encoding = 'utf-8'
-            print(f"  ✓ Sukces: {response.status_code} ({len(response.content)} bajtów)")
-            return response
-        except requests.RequestException as e:
-            print(f"  ✗ Błąd: {e}")
-            if attempt < retry - 1:
-                wait_time = (attempt + 1) * 2
-                print(f"  ⏳ Ponowna próba za {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                print(f"  ✗ Nie udało się pobrać strony po {retry} próbach")
-                return None
+            log.info("  → Pobieranie: %s (próba %s/%s)", url, attempt + 1, attempts)
+            async with session.get(url, headers=headers, allow_redirects=True) as response:
+                if response.status == 304:
+                    log.info("  ✓ Bez zmian: 304 (%s)", url)
+                    return NOT_MODIFIED
+                elif response.status == 429 or response.status >= 500:
+                    # Przeciążenie/błąd serwera (w tym 501, 505, 520-524 z Cloudflare) - ponawiamy
+                    log.warning("  ✗ Błąd (%s): HTTP %s", url, response.status)
+                    retry_after = get_retry_after(response)
+                    if retry_after is not None:
+                        # Serwer podał czas - respektujemy go, ale nie dłużej niż limit
+                        wait_time = min(RETRY_MAX_DELAY, retry_after)
+                else:
+                    response.raise_for_status()
+                    content = await response.read()
+                    encoding = response.headers.get('Content-Encoding', 'identity')
+                    log.info("  ✓ Sukces: %s (%s bajtów, %s)", response.status, len(content), encoding)
+                    http_cache[url] = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                    }
+                    return content, response.charset
+        except aiohttp.ClientResponseError as e:
+            # Pozostałe błędy 4xx (np. 404) są trwałe - bez retry
+            log.warning("  ✗ Błąd (%s): %s", url, e)
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning("  ✗ Błąd (%s): %s", url, e)
+        
+        if attempt < attempts - 1:
+            log.warning("  ⏳ Ponowna próba za %.1fs...", wait_time)
+            await asyncio.sleep(wait_time)
+    
+    log.error("  ✗ Nie udało się pobrać strony %s po %s próbach", url, attempts)
+    return None
 
 
 def parse_datetime(datetime_str):
     """Parsuje datę w formacie ISO 8601 z timezone"""
     try:
-        # Format: 2025-12-30T11:44:00+01:00
+        # Format: 2025-12-30T11:44:00+01:00 - offset jest zawsze podany
         dt = datetime.fromisoformat(datetime_str)
-        # Upewniamy się, że ma timezone
-        if dt.tzinfo is None:
-            dt = pytz.timezone('Europe/Warsaw').localize(dt)
-        return dt
-    except Exception as e:
-        print(f"  ⚠ Błąd parsowania daty '{datetime_str}': {e}")
+    except ValueError as e:
+        log.debug("  ⚠ Błąd parsowania daty '%s': %s", datetime_str, e)
         return None
+    if dt.tzinfo is not None:
+        return dt
+    # Fallback dla daty bez offsetu - przyjmujemy czas warszawski
+    return dt.replace(tzinfo=WARSAW_TZ)
 
 
-def is_recent(article_date, hours=TIME_FILTER_HOURS):
-    """Sprawdza czy artykuł jest z ostatnich X godzin"""
+def is_recent(article_date, cutoff):
+    """Sprawdza czy artykuł jest nowszy niż granica czasowa (cutoff)"""
     if article_date is None:
         return False
-    now = datetime.now(pytz.timezone('Europe/Warsaw'))
-    cutoff = now - timedelta(hours=hours)
     return article_date >= cutoff
 
 
-def extract_articles_from_page(soup, page_num):
-    """Wyciąga artykuły z pojedynczej strony"""
+def get_html_parser(content, charset=None):
+    """
+    Zwraca parser HTML z właściwym kodowaniem: charset z nagłówka HTTP,
+    potem <meta charset> ze strony, a gdy strona nic nie deklaruje - UTF-8
+    (domyślnie lxml przyjąłby Latin-1).
+    """
+    if charset is None:
+        if META_CHARSET_RE.search(content[:4096]):
+            return None  # lxml sam odczyta kodowanie z <meta>
+        charset = 'utf-8'
+    try:
+        return html.HTMLParser(encoding=charset)
+    except LookupError:
+        log.warning("  ⚠ Nieznane kodowanie '%s' - używam UTF-8", charset)
+        return html.HTMLParser(encoding='utf-8')
+
+
+def extract_articles_from_page(content, page_num, cutoff, charset=None):
+    """
+    Wyciąga artykuły z pojedynczej strony (surowy HTML w bajtach).
+    Zwraca (articles, hit_cutoff) - hit_cutoff=True oznacza, że trafiliśmy
+    na artykuł starszy niż cutoff (lista jest chronologiczna, dalej są starsze).
+    """
     articles = []
+    hit_cutoff = False
+    
+    try:
+        tree = html.fromstring(content, parser=get_html_parser(content, charset))
+    except etree.ParserError as e:
+        log.warning("  ✗ Nie udało się sparsować strony %s: %s", page_num, e)
+        return articles, hit_cutoff
     
     # Szukamy divów z klasą "article"
-    article_divs = soup.find_all('div', class_='article')
+    article_divs = XP_ARTICLES(tree)
     
-    print(f"  📄 Znaleziono {len(article_divs)} kontenerów <div class='article'> na stronie {page_num}")
+    log.info("  📄 Znaleziono %s kontenerów <div class='article'> na stronie %s", len(article_divs), page_num)
     
     for idx, article_div in enumerate(article_divs, 1):
         try:
-            # POPRAWKA: Tytuł jest w <span class="entry-title"> -> <a>
-            title_span = article_div.find('span', class_='entry-title')
-            
-            if not title_span:
-                print(f"    ⚠ [{idx}] Brak <span class='entry-title'> - pomijam")
-                continue
-            
-            title_link = title_span.find('a')
-            
-            if not title_link or not title_link.get('href'):
-                print(f"    ⚠ [{idx}] Brak linku w entry-title - pomijam")
-                continue
+            # Tytuł jest w <span class="entry-title"> -> <a>
+            title_links = XP_TITLE_A(article_div)
             
-            if not title_link or not title_link.get('href'):
-                print(f"    ⚠ [{idx}] Brak linku w entry-title - pomijam")
+            if not title_links or not title_links[0].get('href'):
+                log.debug("    ⚠ [%s] Brak linku w entry-title - pomijam", idx)
                 continue
             
-            title = title_link.get_text(strip=True)
+            title_link = title_links[0]
+            title = title_link.text_content().strip()
             link = title_link.get('href')
             
-            # Budujemy pełny URL
-            if not link.startswith('http'):
+            # Budujemy pełny URL (typowy przypadek "/wiadomosc/..." bez parsowania URL-a;
+            # "//host/..." to link bez schematu, więc idzie przez urljoin)
+            if link.startswith('/') and not link.startswith('//'):
+                link = BASE_URL + link
+            elif not link.startswith('http'):
                 link = urljoin(BASE_URL, link)
             
             # Pomijamy linki zewnętrzne/nieprawidłowe
             if not link.startswith(BASE_URL):
-                print(f"    ⚠ [{idx}] Link zewnętrzny - pomijam: {link}")
+                log.debug("    ⚠ [%s] Link zewnętrzny - pomijam: %s", idx, link)
                 continue
             
             # Wyciągamy datę z <time class="entry-date"> (PIERWSZY tag time)
-            entry_meta = article_div.find('div', class_='entry-meta')
-            time_tag = None
-            
-            if entry_meta:
-                time_tag = entry_meta.find('time', class_='entry-date')
-            
             # Fallback - szukamy bezpośrednio w article_div
-            if not time_tag:
-                time_tag = article_div.find('time', class_='entry-date')
+            datetimes = XP_META_TIME(article_div) or XP_TIME(article_div)
             
-            if not time_tag or not time_tag.get('datetime'):
-                print(f"    ⚠ [{idx}] Brak daty - pomijam: {title[:50]}...")
+            if not datetimes or not datetimes[0]:
+                log.debug("    ⚠ [%s] Brak daty - pomijam: %s...", idx, title[:50])
                 continue
             
-            pub_date = parse_datetime(time_tag['datetime'])
+            pub_date = parse_datetime(datetimes[0])
             if not pub_date:
                 continue
             
-            # Filtr czasowy
-            if not is_recent(pub_date):
-                print(f"    ⏭ [{idx}] Za stary artykuł ({pub_date.strftime('%Y-%m-%d %H:%M')}) - pomijam")
-                continue
+            # Filtr czasowy - kolejne artykuły na liście są jeszcze starsze
+            if not is_recent(pub_date, cutoff):
+                log.debug("    ⏭ [%s] Za stary artykuł (%s) - pomijam resztę strony", idx, pub_date)
+                hit_cutoff = True
+                break
             
-            # Wyciągamy opis z <p> (pierwszy akapit po entry-title)
+            # Wyciągamy opis z <p> w entry-content (pomijamy linki "Czytaj dalej")
             description = ""
-            # Szukamy <p> w entry-content (pomijamy linki "Czytaj dalej")
-            entry_content = article_div.find('div', class_='entry-content')
-            if entry_content:
-                p_tag = entry_content.find('p')
-                if p_tag:
-                    # Usuwamy link "Czytaj dalej"
-                    more_link = p_tag.find('a', class_='more-link')
-                    if more_link:
-                        more_link.decompose()
-                    description = p_tag.get_text(strip=True)
+            p_tags = XP_DESC(article_div)
+            if p_tags:
+                # Składamy tekst z pominięciem linku "Czytaj dalej" (bez modyfikacji drzewa)
+                # i normalizujemy białe znaki z formatowania HTML do pojedynczych spacji
+                description = ' '.join(''.join(XP_DESC_TEXT(p_tags[0])).split())
             
             article = {
                 'title': title,
@@ -179,37 +350,58 @@ def extract_articles_from_page(soup, page_num):
             }
             
             articles.append(article)
-            print(f"    ✓ [{idx}] {title[:60]}... ({pub_date.strftime('%Y-%m-%d %H:%M')})")
+            log.debug("    ✓ [%s] %s... (%s)", idx, title[:60], pub_date)
             
         except Exception as e:
-            print(f"    ✗ [{idx}] Błąd parsowania artykułu: {e}")
-            import traceback
-            traceback.print_exc()
+            log.warning("    ✗ [%s] Błąd parsowania artykułu: %s", idx, e)
+            if DEBUG:
+                traceback.print_exc()
             continue
     
-    return articles
+    return articles, hit_cutoff
 
 
-def remove_duplicates(articles):
-    """Usuwa duplikaty na podstawie linku (GUID)"""
-    seen = set()
-    unique = []
+async def fetch_and_parse_page(session, page_num, cutoff, http_cache, page_cache):
+    """
+    Pobiera i parsuje stronę. Dla odpowiedzi 304 używa artykułów z page_cache
+    zamiast parsowania.
+    Zwraca (articles, hit_cutoff) lub None, jeśli strony nie udało się pobrać.
+    """
+    url = get_page_url(page_num)
+    result = await fetch_page_async(session, url, http_cache)
+    if result is None:
+        return None
+    
+    if result is NOT_MODIFIED:
+        # Strona bez zmian - odfiltrowujemy tylko artykuły, które w międzyczasie się zestarzały
+        articles, hit_cutoff = page_cache[url]
+        recent = [article for article in articles if is_recent(article['pub_date'], cutoff)]
+        log.info("  ♻ Strona %s bez zmian - %s artykułów z cache", page_num, len(recent))
+        return recent, hit_cutoff or len(recent) < len(articles)
     
-    for article in articles:
-        if article['guid'] not in seen:
-            seen.add(article['guid'])
-            unique.append(article)
+    # Nowa treść - stare artykuły tej strony są nieaktualne do czasu sparsowania
+    content, charset = result
+    page_cache.pop(url, None)
+    # Parsowanie lxml to kilka ms na stronę - wykonujemy je bezpośrednio
+    result = extract_articles_from_page(content, page_num, cutoff, charset)
+    page_cache[url] = result
+    return result
+
+
+def remove_duplicates(articles):
+    """Usuwa duplikaty na podstawie linku (GUID) - zachowuje ostatnie wystąpienie"""
+    unique = list({article['guid']: article for article in articles}.values())
     
     removed = len(articles) - len(unique)
     if removed > 0:
-        print(f"\n🔄 Usunięto {removed} duplikatów")
+        log.info("\n🔄 Usunięto %s duplikatów", removed)
     
     return unique
 
 
 def generate_rss_feed(articles, output_file=OUTPUT_FILE):
     """Generuje plik RSS z artykułami"""
-    print(f"\n📝 Generowanie RSS...")
+    log.info("\n📝 Generowanie RSS...")
     
     # Inicjalizacja feed generatora
     fg = FeedGenerator()
@@ -219,7 +411,7 @@ def generate_rss_feed(articles, output_file=OUTPUT_FILE):
     fg.link(href=NEWS_URL, rel='alternate')
     fg.description('Najnowsze wiadomości z serwisu Bankier.pl')
     fg.language('pl')
-    fg.updated(datetime.now(pytz.timezone('Europe/Warsaw')))
+    fg.updated(datetime.now(WARSAW_TZ))
     
     # Sortujemy artykuły od najnowszych
     articles_sorted = sorted(articles, key=lambda x: x['pub_date'], reverse=True)
@@ -234,91 +426,151 @@ def generate_rss_feed(articles, output_file=OUTPUT_FILE):
         fe.published(article['pub_date'])
         fe.updated(article['pub_date'])
     
-    # Zapisujemy do pliku
-    fg.rss_file(output_file, pretty=True)
-    print(f"✓ Zapisano do pliku: {output_file}")
-    print(f"✓ Liczba artykułów w RSS: {len(articles_sorted)}")
+    # Zapisujemy do pliku (bez formatowania - plik czytają czytniki RSS)
+    fg.rss_file(output_file, pretty=PRETTY_RSS)
+    log.info("✓ Zapisano do pliku: %s", output_file)
+    log.info("✓ Liczba artykułów w RSS: %s", len(articles_sorted))
 
 
 # ============================================================================
 # GŁÓWNA LOGIKA
 # ============================================================================
 
-def main():
+async def main():
     """Główna funkcja programu"""
-    print("=" * 70)
-    print("🚀 BANKIER.PL RSS GENERATOR")
-    print("=" * 70)
-    print(f"📅 Filtr czasowy: ostatnie {TIME_FILTER_HOURS}h")
-    print(f"📄 Stron do przeskanowania: {PAGES_TO_SCAN}")
-    print(f"⏱️  Opóźnienie między requestami: {REQUEST_DELAY}s")
-    print("=" * 70)
+    log.info("=" * 70)
+    log.info("🚀 BANKIER.PL RSS GENERATOR")
+    log.info("=" * 70)
+    log.info("📅 Filtr czasowy: ostatnie %sh", TIME_FILTER_HOURS)
+    log.info("📄 Stron do przeskanowania: %s", PAGES_TO_SCAN)
+    log.info("🔀 Maks. równoległych requestów: %s", MAX_CONCURRENT_REQUESTS)
+    log.info("=" * 70)
     
     all_articles = []
+    # Granica czasowa liczona raz dla całego przebiegu
+    cutoff = datetime.now(WARSAW_TZ) - timedelta(hours=TIME_FILTER_HOURS)
     
-    # Pętla po stronach
-    for page_num in range(1, PAGES_TO_SCAN + 1):
-        print(f"\n📖 Strona {page_num}/{PAGES_TO_SCAN}")
-        print("-" * 70)
-        
-        url = get_page_url(page_num)
-        response = fetch_page(url)
-        
-        if response is None:
-            print(f"  ⚠ Pomijam stronę {page_num} z powodu błędu")
-            continue
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        articles = extract_articles_from_page(soup, page_num)
-        all_articles.extend(articles)
-        
-        print(f"  ✓ Zebrano {len(articles)} artykułów ze strony {page_num}")
-        
-        # Opóźnienie przed kolejnym requestem (anti-bot)
-        if page_num < PAGES_TO_SCAN:
-            print(f"  ⏳ Czekam {REQUEST_DELAY}s przed kolejną stroną...")
-            time.sleep(REQUEST_DELAY)
+    # Cache z poprzedniego uruchomienia - walidatory wysyłamy tylko dla stron,
+    # których artykuły mamy zapisane (inaczej 304 nie miałoby czego użyć)
+    page_cache = load_pickle(PAGE_CACHE_FILE, {})
+    http_cache = {url: v for url, v in load_http_cache().items() if url in page_cache}
+    
+    # Artykuły z poprzedniego uruchomienia, które wciąż mieszczą się w oknie czasowym
+    saved = load_pickle(ARTICLES_CACHE_FILE, {})
+    if not isinstance(saved, dict):
+        saved = {}
+    previous_articles = [
+        article for article in saved.get('articles', [])
+        if is_recent(article['pub_date'], cutoff)
+    ]
+    # Zatrzymać się na znanych artykułach możemy tylko wtedy, gdy poprzednie
+    # uruchomienie nie pominęło żadnej strony - inaczej brakujące artykuły
+    # z pominiętej strony nigdy by nie trafiły do feedu
+    known_guids = {article['guid'] for article in previous_articles} if saved.get('complete') else set()
+    pages_failed = False
+    
+    # Pobieramy strony w przesuwanym oknie (MAX_CONCURRENT_REQUESTS stron naraz)
+    # i zbieramy wyniki w kolejności - strona k+MAX_CONCURRENT_REQUESTS startuje
+    # dopiero po przetworzeniu strony k, więc po dojściu do granicy czasowej
+    # nie pobieramy kolejnych stron
+    log.info("\n🌐 Pobieranie do %s stron...", PAGES_TO_SCAN)
+    timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=CONNECTION_POOL_SIZE, limit_per_host=CONNECTION_POOL_SIZE)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout, connector=connector) as session:
+        tasks = []
+        try:
+            # Pętla po stronach (wyniki w kolejności stron)
+            for page_num in range(1, PAGES_TO_SCAN + 1):
+                # Przesuwamy okno pobierania
+                while len(tasks) < min(page_num + MAX_CONCURRENT_REQUESTS - 1, PAGES_TO_SCAN):
+                    tasks.append(asyncio.create_task(fetch_and_parse_page(
+                        session, len(tasks) + 1, cutoff, http_cache, page_cache
+                    )))
+                
+                log.info("\n📖 Strona %s/%s", page_num, PAGES_TO_SCAN)
+                log.info("-" * 70)
+                
+                try:
+                    result = await tasks[page_num - 1]
+                except Exception as e:
+                    log.warning("  ✗ Błąd: %s", e)
+                    result = None
+                
+                if result is None:
+                    log.warning("  ⚠ Pomijam stronę %s z powodu błędu", page_num)
+                    pages_failed = True
+                    continue
+                
+                articles, hit_cutoff = result
+                all_articles.extend(articles)
+                
+                log.info("  ✓ Zebrano %s artykułów ze strony %s", len(articles), page_num)
+                
+                # Dalsze strony zawierają już tylko starsze artykuły
+                if hit_cutoff or not articles:
+                    if page_num < PAGES_TO_SCAN:
+                        log.info("  ⏹ Osiągnięto granicę %sh - pomijam kolejne strony", TIME_FILTER_HOURS)
+                    break
+                
+                # Dalsze strony mamy już z poprzedniego (kompletnego) uruchomienia,
+                # o ile w tym uruchomieniu nie pominęliśmy żadnej wcześniejszej strony.
+                # Sprawdzamy tylko najstarszy artykuł strony - podbity/przypięty znany
+                # artykuł wyżej na liście nie może ukryć nowych artykułów z dalszych stron
+                if not pages_failed and articles[-1]['guid'] in known_guids:
+                    if page_num < PAGES_TO_SCAN:
+                        log.info("  ⏹ Dotarto do znanych artykułów - pomijam kolejne strony")
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    save_http_cache(http_cache)
+    save_pickle(page_cache, PAGE_CACHE_FILE)
     
     # Podsumowanie
-    print("\n" + "=" * 70)
-    print(f"📊 PODSUMOWANIE")
-    print("=" * 70)
-    print(f"Zebrano łącznie: {len(all_articles)} artykułów")
+    log.info("\n" + "=" * 70)
+    log.info("📊 PODSUMOWANIE")
+    log.info("=" * 70)
+    log.info("Zebrano łącznie: %s artykułów", len(all_articles))
+    log.info("Z poprzedniego uruchomienia: %s artykułów", len(previous_articles))
+    
+    # Łączymy z poprzednim uruchomieniem i usuwamy duplikaty (nowsze dane wygrywają)
+    unique_articles = remove_duplicates(previous_articles + all_articles)
     
-    if not all_articles:
-        print("⚠ Nie znaleziono żadnych artykułów! Sprawdź konfigurację.")
-        print("\n💡 DEBUGOWANIE - zapisuję pierwszą stronę do pliku debug.html")
+    if not unique_articles:
+        log.warning("⚠ Nie znaleziono żadnych artykułów! Sprawdź konfigurację.")
+        log.info("\n💡 DEBUGOWANIE - zapisuję pierwszą stronę do pliku debug.html")
         try:
             response = requests.get(NEWS_URL, headers=HEADERS, timeout=10)
-            with open('debug.html', 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            print("✓ Zapisano debug.html - sprawdź ten plik aby zobaczyć strukturę HTML")
+            # Zapisujemy surowe bajty - kodowanie zadeklarowane jest w <meta charset>
+            with open('debug.html', 'wb') as f:
+                f.write(response.content)
+            log.info("✓ Zapisano debug.html - sprawdź ten plik aby zobaczyć strukturę HTML")
         except Exception as e:
-            print(f"✗ Nie udało się zapisać debug.html: {e}")
+            log.error("✗ Nie udało się zapisać debug.html: %s", e)
         return 1
     
-    # Usuwanie duplikatów
-    unique_articles = remove_duplicates(all_articles)
-    print(f"Po deduplikacji: {len(unique_articles)} unikalnych artykułów")
+    log.info("Po deduplikacji: %s unikalnych artykułów", len(unique_articles))
+    save_pickle({'articles': unique_articles, 'complete': not pages_failed}, ARTICLES_CACHE_FILE)
     
     # Generowanie RSS
     generate_rss_feed(unique_articles)
     
-    print("\n" + "=" * 70)
-    print("✅ ZAKOŃCZONO POMYŚLNIE")
-    print("=" * 70)
+    log.info("\n" + "=" * 70)
+    log.info("✅ ZAKOŃCZONO POMYŚLNIE")
+    log.info("=" * 70)
     
     return 0
 
 
 if __name__ == "__main__":
     try:
-        sys.exit(main())
+        sys.exit(asyncio.run(main()))
     except KeyboardInterrupt:
-        print("\n\n⚠ Przerwano przez użytkownika")
+        log.warning("\n\n⚠ Przerwano przez użytkownika")
         sys.exit(1)
     except Exception as e:
-        print(f"\n\n❌ KRYTYCZNY BŁĄD: {e}")
-        import traceback
+        log.error("\n\n❌ KRYTYCZNY BŁĄD: %s", e)
         traceback.print_exc()
         sys.exit(1)